@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingsProvider:
+    """Local sentence embeddings used for semantic cache lookups (requires sentence-transformers)"""
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name)
+        self.dimension = self._model.get_sentence_embedding_dimension()
+
+    async def embed(self, text: str):
+        """Return a normalized float32 embedding without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        vector = await loop.run_in_executor(
+            None, lambda: self._model.encode([text], normalize_embeddings=True, convert_to_numpy=True)
+        )
+        return vector.astype("float32")
+
+
+class _SemanticIndex:
+    """Inner-product index over normalized embeddings for one endpoint/model scope (requires faiss)"""
+
+    def __init__(self, dimension: int):
+        import faiss
+        self._faiss = faiss
+        self._dimension = dimension
+        self._index = faiss.IndexFlatIP(dimension)
+        self._keys: List[str] = []
+        self._vectors = []
+
+    def add(self, key: str, vector):
+        self._index.add(vector)
+        self._keys.append(key)
+        self._vectors.append(vector)
+
+    def search(self, vector) -> Tuple[Optional[str], float]:
+        if not self._keys:
+            return None, 0.0
+        scores, ids = self._index.search(vector, 1)
+        if ids[0][0] < 0:
+            return None, 0.0
+        return self._keys[ids[0][0]], float(scores[0][0])
+
+    def prune(self, live_keys):
+        """Rebuild the index keeping only entries still present in the exact-match store"""
+        kept = [(k, v) for k, v in zip(self._keys, self._vectors) if k in live_keys]
+        self._index = self._faiss.IndexFlatIP(self._dimension)
+        self._keys = [k for k, _ in kept]
+        self._vectors = [v for _, v in kept]
+        for _, v in kept:
+            self._index.add(v)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class ResponseCache:
+    """LRU + TTL cache for LLM responses with optional Redis and semantic (embedding) lookup"""
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 1800, redis_url: Optional[str] = None,
+                 embeddings: Optional[EmbeddingsProvider] = None, similarity_threshold: float = 0.90):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._embeddings = embeddings
+        self._semantic: Dict[str, _SemanticIndex] = {}
+        self._redis = None
+        if redis_url:
+            import redis.asyncio as redis
+            # Short timeouts so an unreachable Redis degrades to the local cache instead of stalling calls
+            self._redis = redis.from_url(redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Build a cache from RESPONSE_CACHE_* / REDIS_URL / SEMANTIC_CACHE_MODEL environment variables"""
+        embeddings = None
+        semantic_model = os.getenv("SEMANTIC_CACHE_MODEL")
+        if semantic_model:
+            try:
+                embeddings = EmbeddingsProvider(semantic_model)
+            except ImportError:
+                logger.warning("SEMANTIC_CACHE_MODEL set but sentence-transformers is not installed; semantic cache disabled")
+        return cls(
+            maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+            ttl=int(os.getenv("RESPONSE_CACHE_TTL", "1800")),
+            redis_url=os.getenv("REDIS_URL") or None,
+            embeddings=embeddings,
+            similarity_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.90")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    @property
+    def embeddings(self) -> Optional[EmbeddingsProvider]:
+        return self._embeddings
+
+    @staticmethod
+    def make_scope(endpoint: str, model: str, api_key: Optional[str] = None, system: Optional[str] = None) -> str:
+        """Semantic lookup scope: one endpoint/model/system prompt as seen with one API key"""
+        key_hash = hashlib.sha256((api_key or "").encode()).hexdigest()
+        system_hash = hashlib.sha256((system or "").encode()).hexdigest()
+        return f"{endpoint}|{model}|{key_hash}|{system_hash}"
+
+    @staticmethod
+    def make_key(endpoint: str, model: str, prompt: str, api_key: Optional[str] = None) -> str:
+        scope = ResponseCache.make_scope(endpoint, model, api_key)
+        return hashlib.sha256(f"{scope}|{prompt}".encode()).hexdigest()
+
+    async def get(self, key: str, scope: Optional[str] = None, prompt: Optional[str] = None) -> Optional[str]:
+        """Exact lookup first, then Redis, then nearest-neighbour lookup within the same scope"""
+        value = self._get_local(key)
+        if value is not None:
+            return value
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(f"llmcache:{key}")
+            except Exception as e:
+                logger.warning("Redis cache lookup failed: %s", e)
+                raw = None
+            if raw is not None:
+                value = raw.decode() if isinstance(raw, bytes) else raw
+                self._set_local(key, value, self.ttl)
+                return value
+
+        if self._embeddings is not None and scope in self._semantic and prompt:
+            try:
+                vector = await self._embeddings.embed(prompt)
+                match, score = self._semantic[scope].search(vector)
+            except Exception as e:
+                logger.warning("Semantic cache lookup failed: %s", e)
+                return None
+            if match is not None and score >= self.similarity_threshold:
+                return self._get_local(match)
+        return None
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None,
+                  scope: Optional[str] = None, prompt: Optional[str] = None):
+        ttl = self.ttl if ttl is None else ttl
+        self._set_local(key, value, ttl)
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(f"llmcache:{key}", value, ex=ttl)
+            except Exception as e:
+                logger.warning("Redis cache write failed: %s", e)
+
+        if self._embeddings is not None and scope and prompt:
+            try:
+                vector = await self._embeddings.embed(prompt)
+                index = self._semantic.get(scope)
+                if index is None:
+                    index = self._semantic[scope] = _SemanticIndex(self._embeddings.dimension)
+                index.add(key, vector)
+                if len(index) > self.maxsize:
+                    index.prune(self._entries)
+            except Exception as e:
+                logger.warning("Semantic cache write failed: %s", e)
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.close()
+
+    def _get_local(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: str, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -1,209 +1,514 @@
 import httpx
-import json
+import orjson
 import asyncio
-from typing import List, Dict, Any, Union
+import logging
+import base64
+import os
+import random
+import re
+import struct
+import weakref
+from contextlib import AsyncExitStack
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+from cache import ResponseCache
+
+try:
+    # Optional: SigV4-signed Bedrock calls using the standard AWS credential chain
+    from aiobotocore.session import get_session
+    from botocore.config import Config as BotoConfig
+except ImportError:
+    get_session = None
+
+try:
+    # Optional: accurate token counts for truncating responses embedded in later prompts
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+logger = logging.getLogger(__name__)
+
+MAX_INFLIGHT_PER_HOST = int(os.getenv("MAX_INFLIGHT_PER_HOST", "4"))
+# Per-request timeout for LLM calls, applied even when the HTTP client is shared with shorter defaults
+LLM_TIMEOUT = httpx.Timeout(120.0)
+# Let Bedrock participants without an API key use the server's AWS credentials (requires aiobotocore).
+# Off by default: anyone who can reach the API could otherwise spend the operator's Bedrock budget
+BEDROCK_USE_AWS_CREDENTIALS = os.getenv("BEDROCK_USE_AWS_CREDENTIALS", "false").lower() == "true"
+# Minimum pairwise cosine similarity for all three responses to count as the same answer
+CONSENSUS_SIMILARITY_THRESHOLD = float(os.getenv("CONSENSUS_SIMILARITY_THRESHOLD", "0.95"))
+# Cap on each response embedded in ranking/chairman prompts, so one rambling model can't blow up their size
+MAX_EMBEDDED_RESPONSE_TOKENS = int(os.getenv("MAX_EMBEDDED_RESPONSE_TOKENS", "2000"))
+
+def _backoff(attempt: int, response: httpx.Response = None, factor: float = 2, cap: float = 60) -> float:
+    """Seconds to wait before retrying (at most cap): the server's Retry-After if given, else full-jitter exponential backoff"""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), cap)
+        except ValueError:
+            # Retry-After may also be an HTTP date; fall back to our own backoff
+            pass
+    # Random jitter keeps participants sharing a rate limit from retrying in lockstep
+    return random.uniform(0, min((2 ** attempt) * factor, cap))
+
+# Static instructions are sent as a separate system block, a byte-identical prefix ahead of the
+# per-request content. They are far below Bedrock's minimum cacheable prefix, so no cache_control is set
+RANKING_SYSTEM_PROMPT = """You will be given an original prompt and 3 responses from different AI models.
+Rank these responses from best to worst (1=best, 3=worst) based on accuracy, helpfulness, and clarity.
+Respond ONLY with a JSON object in this exact format:
+{"rankings": {"A": 1, "B": 2, "C": 3}, "reasoning": "brief explanation"}"""
+
+CHAIRMAN_SYSTEM_PROMPT = """You are the chairman reviewing a consensus process.
+You will be given the original prompt, the responses from three AI models, and how each model ranked all responses.
+Based on the responses and rankings, create a consolidated final answer that represents the best consensus.
+Include a brief explanation of how you synthesized the responses."""
+
+# Per-request user messages, filled with str.format; the system prompts above never change
+RANKING_TEMPLATE = """Original prompt: {prompt}
+
+Here are 3 responses from different AI models:
+
+Response A: {a}
+
+Response B: {b}
+
+Response C: {c}"""
+
+CHAIRMAN_TEMPLATE = """Original prompt: {prompt}
+
+Three AI models provided these responses:
+Response A: {a}
+Response B: {b}
+Response C: {c}
+
+Each model ranked all responses:
+Participant 1 rankings: {ranking_1}
+Participant 2 rankings: {ranking_2}
+Participant 3 rankings: {ranking_3}"""
+
+# Bedrock model families, matched in order against the lowercased profile/model ID
+_FAMILY_PATTERNS = [
+    ("claude", ("claude",)),
+    ("titan", ("titan",)),
+    ("nova", ("nova",)),
+    ("llama", ("llama",)),
+    ("mistral", ("mistral", "mixtral")),
+]
+
+@lru_cache(maxsize=256)
+def _family(model: str) -> str:
+    """Classify a Bedrock model ID into the family that decides its request/response format"""
+    m = model.lower()
+    return next((family for family, patterns in _FAMILY_PATTERNS if any(p in m for p in patterns)), "generic")
+
+def _inline_system(prompt: str, system: str = None) -> str:
+    """Model families without a separate system field get the instructions inlined"""
+    return f"{system}\n\n{prompt}" if system else prompt
+
+def _claude_body(prompt: str, system: str = None, image_data: str = None) -> Dict:
+    content = [{"type": "text", "text": prompt}]
+    # Claude supports vision
+    if image_data and image_data.startswith('data:image'):
+        # Extract media type and base64 data
+        media_type = image_data.split(';')[0].split(':')[1] if ':' in image_data else 'image/jpeg'
+        base64_data = image_data.split(',')[1] if ',' in image_data else image_data
+        content.append({
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": media_type,
+                "data": base64_data
+            }
+        })
+    body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 4096,
+        "messages": [{"role": "user", "content": content}]
+    }
+    if system:
+        body["system"] = [{"type": "text", "text": system}]
+    return body
+
+def _titan_body(prompt: str, system: str = None, image_data: str = None) -> Dict:
+    return {
+        "inputText": _inline_system(prompt, system),
+        "textGenerationConfig": {
+            "maxTokenCount": 4096,
+            "temperature": 0.7
+        }
+    }
+
+def _nova_body(prompt: str, system: str = None, image_data: str = None) -> Dict:
+    # Amazon Nova models use messages format
+    body = {
+        "messages": [
+            {"role": "user", "content": [{"text": prompt}]}
+        ],
+        "inferenceConfig": {
+            "maxTokens": 4096,
+            "temperature": 0.7
+        }
+    }
+    if system:
+        body["system"] = [{"text": system}]
+    return body
+
+def _llama_body(prompt: str, system: str = None, image_data: str = None) -> Dict:
+    return {
+        "prompt": _inline_system(prompt, system),
+        "max_gen_len": 2048,
+        "temperature": 0.7
+    }
+
+def _mistral_body(prompt: str, system: str = None, image_data: str = None) -> Dict:
+    return {
+        "prompt": _inline_system(prompt, system),
+        "max_tokens": 4096,
+        "temperature": 0.7
+    }
+
+def _generic_body(prompt: str, system: str = None, image_data: str = None) -> Dict:
+    # Generic format - try messages format first
+    return {
+        "messages": [
+            {"role": "user", "content": _inline_system(prompt, system)}
+        ],
+        "max_tokens": 4096
+    }
+
+def _parse_claude(response_body: Dict) -> str:
+    usage = response_body.get('usage', {})
+    logger.debug("Bedrock prompt cache - read: %s, written: %s tokens", usage.get('cache_read_input_tokens', 0), usage.get('cache_creation_input_tokens', 0))
+    return response_body['content'][0]['text']
+
+def _parse_generic(response_body: Dict) -> str:
+    # Try common response formats
+    if 'content' in response_body:
+        return response_body['content'][0]['text']
+    elif 'output' in response_body:
+        return response_body['output']['message']['content'][0]['text']
+    return str(response_body)
+
+_REQUEST_BUILDERS: Dict[str, Callable[..., Dict]] = {
+    "claude": _claude_body,
+    "titan": _titan_body,
+    "nova": _nova_body,
+    "llama": _llama_body,
+    "mistral": _mistral_body,
+    "generic": _generic_body,
+}
+
+# Bedrock families whose request bodies sample at temperature 0.7; their responses vary between
+# calls, so they bypass the response cache
+_SAMPLED_FAMILIES = frozenset({"titan", "nova", "llama", "mistral"})
+
+def _parse_generic_chunk(chunk: Dict) -> str:
+    if chunk.get("type") == "content_block_delta":
+        return chunk.get("delta", {}).get("text", "")
+    if "contentBlockDelta" in chunk:
+        return chunk["contentBlockDelta"].get("delta", {}).get("text", "")
+    return chunk.get("generation") or chunk.get("outputText") or ""
+
+# Text deltas from invoke-with-response-stream chunks, per model family
+_STREAM_PARSERS: Dict[str, Callable[[Dict], str]] = {
+    "claude": lambda chunk: chunk.get("delta", {}).get("text", "") if chunk.get("type") == "content_block_delta" else "",
+    "titan": lambda chunk: chunk.get("outputText", ""),
+    "nova": lambda chunk: chunk.get("contentBlockDelta", {}).get("delta", {}).get("text", ""),
+    "llama": lambda chunk: chunk.get("generation", ""),
+    "mistral": lambda chunk: (chunk.get("outputs") or [{}])[0].get("text", ""),
+    "generic": _parse_generic_chunk,
+}
+
+def _pop_event_stream_messages(buffer: bytearray):
+    """Pop complete AWS event-stream messages off the buffer, yielding (headers, payload)"""
+    # Message layout: total length (4), headers length (4), prelude CRC (4), headers, payload, message CRC (4)
+    while len(buffer) >= 12:
+        total_length, headers_length = struct.unpack(">II", buffer[:8])
+        if len(buffer) < total_length:
+            return
+        raw_headers = bytes(buffer[12:12 + headers_length])
+        payload = bytes(buffer[12 + headers_length:total_length - 4])
+        del buffer[:total_length]
+        
+        headers = {}
+        pos = 0
+        while pos < len(raw_headers):
+            name_length = raw_headers[pos]
+            name = raw_headers[pos + 1:pos + 1 + name_length].decode()
+            pos += 1 + name_length
+            if raw_headers[pos] != 7:
+                # Bedrock only sends string headers; stop rather than mis-parse anything else
+                break
+            value_length = struct.unpack(">H", raw_headers[pos + 1:pos + 3])[0]
+            headers[name] = raw_headers[pos + 3:pos + 3 + value_length].decode()
+            pos += 3 + value_length
+        yield headers, payload
+
+def _sse(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+# Matches both the frontend's "bedrock://region=us-east-1" form and "?region=..." query strings
+_REGION_PARAM = re.compile(r"region=([^&#]+)")
+# AWS region names (us-east-1, ap-southeast-2, us-gov-west-1); anything else is ignored
+_REGION_NAME = re.compile(r"[a-z]{2}(-[a-z]+)+-\d")
+# Each region costs an upstream call (and, for SigV4, a client), so endpoints can't name unlimited regions
+MAX_BEDROCK_REGIONS = 5
+
+def bedrock_regions(endpoint: str) -> List[str]:
+    """Valid regions named in the endpoint (repeated or comma-separated region=), deduplicated and capped, or the default"""
+    names = (r.strip() for value in _REGION_PARAM.findall(endpoint) for r in unquote(value).split(","))
+    regions = list(dict.fromkeys(r for r in names if _REGION_NAME.fullmatch(r)))
+    return regions[:MAX_BEDROCK_REGIONS] or ["us-east-1"]
+
+def bedrock_region(endpoint: str) -> str:
+    """Extract region from endpoint or use default"""
+    return bedrock_regions(endpoint)[0]
+
+_RESPONSE_PARSERS: Dict[str, Callable[[Dict], str]] = {
+    "claude": _parse_claude,
+    "titan": lambda body: body['results'][0]['outputText'],
+    # Nova uses output.message.content format
+    "nova": lambda body: body['output']['message']['content'][0]['text'],
+    "llama": lambda body: body['generation'],
+    "mistral": lambda body: body['outputs'][0]['text'],
+    "generic": _parse_generic,
+}
+
+def _truncate(text: str, max_tokens: int = MAX_EMBEDDED_RESPONSE_TOKENS) -> str:
+    """Cut text to max_tokens (about 4 characters per token without tiktoken) with a truncation marker"""
+    if _encoding is None:
+        max_chars = max_tokens * 4
+        return text if len(text) <= max_chars else text[:max_chars] + "\n...[truncated]"
+    tokens = _encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens]) + "\n...[truncated]"
+
+RESPONSE_LABELS = ("A", "B", "C")
+_JSON_OBJECT = re.compile(r"\{.*\}", re.S)
+
+def _parse_rankings(ranking_response: str) -> Optional[Dict[str, int]]:
+    """Extract the {"A": n, "B": n, "C": n} assignment from a ranking reply, or None if malformed"""
+    match = _JSON_OBJECT.search(ranking_response)
+    if not match:
+        return None
+    try:
+        rankings = orjson.loads(match.group(0)).get("rankings")
+        parsed = {label: int(rankings[label]) for label in RESPONSE_LABELS}
+    except (orjson.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError):
+        return None
+    if sorted(parsed.values()) != [1, 2, 3]:
+        return None
+    return parsed
+
+def _format_rankings(ranking: Dict[str, Any]) -> str:
+    """Compact form for the chairman prompt; falls back to the raw reply when it couldn't be parsed"""
+    parsed = ranking.get("parsed_rankings")
+    if not parsed:
+        return ranking["ranking"]
+    return ", ".join(f"{label}={parsed[label]}" for label in RESPONSE_LABELS)
+
+def _borda_scores(rankings: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Borda scores over the parsed rankings (3 points for 1st ... 1 for 3rd)"""
+    scores = {label: 0 for label in RESPONSE_LABELS}
+    for ranking in rankings:
+        for label, rank in (ranking.get("parsed_rankings") or {}).items():
+            scores[label] += len(RESPONSE_LABELS) + 1 - rank
+    return scores
+
+def _unanimous_winner(rankings: List[Dict[str, Any]]) -> Optional[str]:
+    """Label every participant ranked first, or None if any ranking is missing or they disagree"""
+    if len(rankings) != len(RESPONSE_LABELS) or not all(r.get("parsed_rankings") for r in rankings):
+        return None
+    scores = _borda_scores(rankings)
+    winner = max(scores, key=scores.get)
+    return winner if scores[winner] == len(RESPONSE_LABELS) * len(rankings) else None
 
 class ConsensusEngine:
-    async def call_bedrock(self, model: str, prompt: str, api_key: str, region: str = "us-east-1", max_retries: int = 3, image_data: str = None) -> str:
-        """Call AWS Bedrock using API key authentication with inference profiles"""
-        print(f"DEBUG: Calling AWS Bedrock - inference profile/model: {model}, region: {region}")
+    def __init__(self, client: httpx.AsyncClient = None, cache: ResponseCache = None):
+        """Hold one long-lived HTTP client so keep-alive connections are reused across calls"""
+        self._cache = cache or ResponseCache.from_env()
+        # Shared with the semantic cache; enables the near-identical-responses chairman shortcut
+        self._embeddings = self._cache.embeddings
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=LLM_TIMEOUT,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=30)
+        )
+        self._sems: "weakref.WeakValueDictionary[Tuple[str, Optional[str]], asyncio.Semaphore]" = weakref.WeakValueDictionary()
+        # aiobotocore bedrock-runtime clients per (region, max_attempts), created on first use
+        self._bedrock_clients: Dict[Tuple[str, int], Any] = {}
+        self._bedrock_lock = asyncio.Lock()
+        self._bedrock_stack = AsyncExitStack()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+    
+    def _sem(self, endpoint: str, api_key: Optional[str] = None) -> asyncio.Semaphore:
+        """Per-(host, API key) semaphore; provider rate limits are per key, so callers with different keys don't queue behind each other"""
+        key = (urlparse(endpoint).netloc, api_key)
+        sem = self._sems.get(key)
+        if sem is None:
+            # Weakly held, so semaphores for keys no request is using are dropped
+            sem = self._sems[key] = asyncio.Semaphore(MAX_INFLIGHT_PER_HOST)
+        return sem
+    
+    async def aclose(self):
+        """Close the HTTP client (unless it was passed in by the caller), the cache and Bedrock clients"""
+        if self._owns_client:
+            await self._client.aclose()
+        await self._cache.aclose()
+        await self._bedrock_stack.aclose()
+    
+    async def _get_bedrock_client(self, region: str, max_retries: int):
+        """Shared SigV4 bedrock-runtime client for a region, with botocore's adaptive retry mode"""
+        # Clients are never evicted, so only real region names may create one
+        if not _REGION_NAME.fullmatch(region):
+            raise Exception(f"Invalid Bedrock region: {region!r}")
+        key = (region, max_retries)
+        async with self._bedrock_lock:
+            if key not in self._bedrock_clients:
+                config = BotoConfig(retries={"mode": "adaptive", "max_attempts": max_retries})
+                self._bedrock_clients[key] = await self._bedrock_stack.enter_async_context(
+                    get_session().create_client("bedrock-runtime", region_name=region, config=config)
+                )
+            return self._bedrock_clients[key]
+    
+    async def _post_with_retry(self, endpoint: str, *, json: Dict, headers: Dict[str, str], api_key: Optional[str] = None, max_retries: int = 3, retry_on_error: bool = False, label: str = "LLM") -> Dict:
+        """POST a JSON body and return the parsed response; 429s back off and retry, other errors only with retry_on_error"""
+        for attempt in range(max_retries):
+            last_attempt = attempt == max_retries - 1
+            logger.debug("Sending %s request to %s (attempt %s/%s)", label, endpoint, attempt + 1, max_retries)
+            try:
+                async with self._sem(endpoint, api_key):
+                    response = await self._client.post(endpoint, content=orjson.dumps(json), headers=headers, timeout=LLM_TIMEOUT)
+            except httpx.HTTPError as e:
+                logger.debug("%s request error: %s", label, e)
+                if retry_on_error and not last_attempt:
+                    await asyncio.sleep(2)
+                    continue
+                raise
+            logger.debug("%s response status: %s", label, response.status_code)
+            
+            # Handle rate limiting with exponential backoff
+            if response.status_code == 429 and not last_attempt:
+                wait_time = _backoff(attempt, response)  # up to 2, 4, 8 seconds
+                logger.debug("%s rate limited (429). Waiting %.1fs before retry...", label, wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            
+            if response.status_code >= 400:
+                # Log error response body for debugging
+                if logger.isEnabledFor(logging.DEBUG):
+                    try:
+                        logger.debug("%s error response: %s", label, orjson.loads(response.content))
+                    except orjson.JSONDecodeError:
+                        logger.debug("%s error response text: %.500s", label, response.text)
+                if retry_on_error and not last_attempt:
+                    await asyncio.sleep(2)
+                    continue
+                response.raise_for_status()
+            
+            return orjson.loads(response.content)
+    
+    async def call_bedrock(self, model: str, prompt: str, api_key: Optional[str], region: str = "us-east-1", max_retries: int = 3, image_data: str = None, system: str = None) -> str:
+        """Call AWS Bedrock with inference profiles, using the API key if given, else SigV4 via aiobotocore (when enabled)"""
+        logger.debug("Calling AWS Bedrock - inference profile/model: %s, region: %s", model, region)
         
         # Bedrock API endpoint - use inference profile if it starts with region prefix, otherwise use model ID
         if model.startswith(('us.', 'eu.', 'ap.')):
             # Cross-region inference profile
             endpoint = f"https://bedrock-runtime.{region}.amazonaws.com/model/{model}/invoke"
-            print(f"DEBUG: Using cross-region inference profile")
+            logger.debug("Using cross-region inference profile")
         else:
             # Direct model ID
             endpoint = f"https://bedrock-runtime.{region}.amazonaws.com/model/{model}/invoke"
-            print(f"DEBUG: Using direct model ID")
+            logger.debug("Using direct model ID")
         
         # Format request based on model family (check both profile and model name)
-        model_lower = model.lower()
-        if "anthropic.claude" in model_lower or "claude" in model_lower:
-            # Claude supports vision
-            if image_data and image_data.startswith('data:image'):
-                # Extract media type and base64 data
-                media_type = image_data.split(';')[0].split(':')[1] if ':' in image_data else 'image/jpeg'
-                base64_data = image_data.split(',')[1] if ',' in image_data else image_data
-                
-                body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4096,
-                    "messages": [{
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": media_type,
-                                    "data": base64_data
-                                }
-                            }
-                        ]
-                    }]
-                }
-            else:
-                body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4096,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ]
-                }
-        elif "amazon.titan" in model_lower or "titan" in model_lower:
-            body = {
-                "inputText": prompt,
-                "textGenerationConfig": {
-                    "maxTokenCount": 4096,
-                    "temperature": 0.7
-                }
-            }
-        elif "amazon.nova" in model_lower or "nova" in model_lower:
-            # Amazon Nova models use messages format
-            body = {
-                "messages": [
-                    {"role": "user", "content": [{"text": prompt}]}
-                ],
-                "inferenceConfig": {
-                    "maxTokens": 4096,
-                    "temperature": 0.7
-                }
-            }
-        elif "meta.llama" in model_lower or "llama" in model_lower:
-            body = {
-                "prompt": prompt,
-                "max_gen_len": 2048,
-                "temperature": 0.7
-            }
-        elif "mistral" in model_lower or "mixtral" in model_lower:
-            body = {
-                "prompt": prompt,
-                "max_tokens": 4096,
-                "temperature": 0.7
+        family = _family(model)
+        body = _REQUEST_BUILDERS[family](prompt, system, image_data)
+        
+        logger.debug("Bedrock body keys: %s", body.keys())
+        if api_key:
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key}"
             }
+            response_body = await self._post_with_retry(endpoint, json=body, headers=headers, api_key=api_key, max_retries=max_retries, retry_on_error=True, label="Bedrock")
         else:
-            # Generic format - try messages format first
-            body = {
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 4096
-            }
+            # No API key and BEDROCK_USE_AWS_CREDENTIALS set: sign with the server's AWS credentials; the SDK handles retries
+            logger.debug("Using AWS SDK (SigV4) for Bedrock")
+            client = await self._get_bedrock_client(region, max_retries)
+            async with self._sem(endpoint):
+                response = await client.invoke_model(
+                    modelId=model,
+                    body=orjson.dumps(body),
+                    contentType="application/json",
+                    accept="application/json"
+                )
+                async with response["body"] as stream:
+                    response_body = orjson.loads(await stream.read())
+        logger.debug("Bedrock response keys: %s", response_body.keys())
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        for attempt in range(max_retries):
-            try:
-                print(f"DEBUG: Bedrock request (attempt {attempt + 1}/{max_retries})")
-                print(f"DEBUG: Bedrock endpoint: {endpoint}")
-                print(f"DEBUG: Bedrock body keys: {body.keys()}")
-                
-                async with httpx.AsyncClient(timeout=120.0) as client:
-                    response = await client.post(endpoint, json=body, headers=headers)
-                    print(f"DEBUG: Bedrock response status: {response.status_code}")
-                    
-                    # Log error response body for debugging
-                    if response.status_code >= 400:
-                        try:
-                            error_body = response.json()
-                            print(f"DEBUG: Bedrock error response: {error_body}")
-                        except:
-                            print(f"DEBUG: Bedrock error response text: {response.text[:500]}")
-                    
-                    # Handle throttling
-                    if response.status_code == 429:
-                        if attempt < max_retries - 1:
-                            wait_time = (2 ** attempt) * 2
-                            print(f"DEBUG: Bedrock throttled. Waiting {wait_time}s before retry...")
-                            await asyncio.sleep(wait_time)
-                            continue
-                    
-                    response.raise_for_status()
-                    response_body = response.json()
-                    print(f"DEBUG: Bedrock response keys: {response_body.keys()}")
-                    
-                    # Parse response based on model family
-                    if "anthropic.claude" in model_lower or "claude" in model_lower:
-                        content = response_body['content'][0]['text']
-                    elif "amazon.titan" in model_lower or "titan" in model_lower:
-                        content = response_body['results'][0]['outputText']
-                    elif "amazon.nova" in model_lower or "nova" in model_lower:
-                        # Nova uses output.message.content format
-                        content = response_body['output']['message']['content'][0]['text']
-                    elif "meta.llama" in model_lower or "llama" in model_lower:
-                        content = response_body['generation']
-                    elif "mistral" in model_lower or "mixtral" in model_lower:
-                        content = response_body['outputs'][0]['text']
-                    else:
-                        # Try common response formats
-                        if 'content' in response_body:
-                            content = response_body['content'][0]['text']
-                        elif 'output' in response_body:
-                            content = response_body['output']['message']['content'][0]['text']
-                        else:
-                            content = str(response_body)
-                    
-                    print(f"DEBUG: Bedrock content (first 200 chars): {content[:200]}")
-                    return content
-                    
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) * 2
-                    print(f"DEBUG: Bedrock throttled. Waiting {wait_time}s before retry...")
-                    await asyncio.sleep(wait_time)
-                    continue
-                print(f"DEBUG: Bedrock HTTP error: {str(e)}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2)
-                    continue
-                raise
-            except Exception as e:
-                print(f"DEBUG: Bedrock error: {str(e)}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2)
-                    continue
-                raise
+        # Parse response based on model family
+        content = _RESPONSE_PARSERS[family](response_body)
         
-        raise Exception(f"Bedrock failed after {max_retries} attempts")
+        logger.debug("Bedrock content (first 200 chars): %.200s", content)
+        return content
     
-    async def call_llm(self, config: Union[Dict, Any], prompt: str, max_retries: int = 3, image_data: str = None) -> str:
-        """Call an LLM endpoint with the given prompt, with retry logic for rate limits"""
+    @staticmethod
+    def _config_fields(config: Union[Dict, Any]) -> Tuple[str, str, str, str]:
+        """Return (endpoint, model, api_key, type) from a dict or Pydantic participant config"""
         # Handle both dict and Pydantic model
         if hasattr(config, 'endpoint'):
-            endpoint = config.endpoint
-            model = config.model
-            api_key = getattr(config, 'api_key', None)
-            endpoint_type = getattr(config, 'type', 'openai')
-        else:
-            endpoint = config["endpoint"]
-            model = config["model"]
-            api_key = config.get("api_key")
-            endpoint_type = config.get("type", "openai")
-        
-        # Check if this is a Bedrock request
-        if endpoint_type == "bedrock" or "bedrock" in endpoint.lower():
-            # Extract region from endpoint or use default
-            region = "us-east-1"
-            if "region=" in endpoint:
-                region = endpoint.split("region=")[1].split("&")[0]
-            
-            if not api_key:
-                raise Exception("Bedrock API key is required. Get one from AWS Console → Bedrock → API Keys")
-            
-            return await self.call_bedrock(model, prompt, api_key, region, max_retries, image_data)
-        
-        print(f"DEBUG: Calling LLM - endpoint: {endpoint}, model: {model}")
+            return config.endpoint, config.model, getattr(config, 'api_key', None), getattr(config, 'type', 'openai')
+        return config["endpoint"], config["model"], config.get("api_key"), config.get("type", "openai")
+    
+    async def call_llm(self, config: Union[Dict, Any], prompt: str, max_retries: int = 3, image_data: str = None, system: str = None) -> str:
+        """Call an LLM endpoint with the given prompt, with retry logic for rate limits"""
+        endpoint, model, api_key, endpoint_type = self._config_fields(config)
         
-        headers = {"Content-Type": "application/json"}
-        if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
+        # Serve repeated prompts from the response cache; image requests and sampled
+        # (temperature > 0) Bedrock families are never cached
+        is_bedrock = endpoint_type == "bedrock" or "bedrock" in endpoint.lower()
+        use_cache = self._cache.enabled and not image_data and not (is_bedrock and _family(model) in _SAMPLED_FAMILIES)
+        if use_cache:
+            # Scoped per API key and system prompt so one caller is never served another caller's
+            # response. Ranking/chairman calls (system set) embed other responses, so a near match
+            # is still a different question: they only get exact hits, never semantic ones
+            cache_key = ResponseCache.make_key(endpoint, model, f"{system}\n\n{prompt}" if system else prompt, api_key)
+            cache_scope = ResponseCache.make_scope(endpoint, model, api_key, system)
+            semantic_prompt = None if system else prompt
+            cached = await self._cache.get(cache_key, scope=cache_scope, prompt=semantic_prompt)
+            if cached is not None:
+                logger.debug("Response cache hit for %s", model)
+                return cached
         
+        # Coalesce identical concurrent calls into a single upstream request
+        inflight_key = (endpoint, model, api_key, system, prompt, image_data)
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._call_llm_uncached(endpoint, model, api_key, endpoint_type, prompt, max_retries, image_data, system))
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda done: self._forget_inflight(inflight_key, done))
+        else:
+            logger.debug("Joining in-flight request for %s", model)
+        # Shielded so one caller being cancelled doesn't cancel the request for the others
+        content = await asyncio.shield(task)
+        if use_cache and content and content.strip():
+            await self._cache.set(cache_key, content, scope=cache_scope, prompt=semantic_prompt)
+        return content
+    
+    def _forget_inflight(self, key: Tuple, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
+    
+    @staticmethod
+    def _build_payload(endpoint: str, model: str, prompt: str, image_data: str = None, system: str = None) -> Dict:
+        """Build the request body for an OpenAI-compatible or Ollama endpoint"""
         # Handle different endpoint formats
         if "openrouter.ai" in endpoint:
             # OpenRouter supports vision for compatible models
@@ -240,8 +545,10 @@ class ConsensusEngine:
                     "prompt": prompt,
                     "stream": False
                 }
-            print(f"DEBUG: Ollama payload keys: {payload.keys()}")
-            print(f"DEBUG: Ollama prompt length: {len(prompt)} chars")
+            if system:
+                payload["system"] = system
+            logger.debug("Ollama payload keys: %s", payload.keys())
+            logger.debug("Ollama prompt length: %s chars", len(prompt))
         else:
             # Generic OpenAI-compatible format with vision support
             if image_data and image_data.startswith('data:image'):
@@ -261,70 +568,134 @@ class ConsensusEngine:
                     "messages": [{"role": "user", "content": prompt}]
                 }
         
-        for attempt in range(max_retries):
-            try:
-                async with httpx.AsyncClient(timeout=120.0) as client:
-                    print(f"DEBUG: Sending request to {endpoint} (attempt {attempt + 1}/{max_retries})")
-                    response = await client.post(endpoint, json=payload, headers=headers)
-                    print(f"DEBUG: Response status: {response.status_code}")
-                    
-                    # Handle rate limiting with exponential backoff
-                    if response.status_code == 429:
-                        if attempt < max_retries - 1:
-                            wait_time = (2 ** attempt) * 2  # 2, 4, 8 seconds
-                            print(f"DEBUG: Rate limited (429). Waiting {wait_time}s before retry...")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"DEBUG: Rate limited after {max_retries} attempts. Giving up.")
-                    
+        # OpenAI-compatible endpoints take the static instructions as a leading system message
+        if system and "messages" in payload:
+            payload["messages"].insert(0, {"role": "system", "content": system})
+        return payload
+    
+    async def _call_llm_uncached(self, endpoint: str, model: str, api_key: str, endpoint_type: str, prompt: str, max_retries: int = 3, image_data: str = None, system: str = None) -> str:
+        """Send the prompt to the configured endpoint, bypassing the response cache"""
+        # Check if this is a Bedrock request
+        if endpoint_type == "bedrock" or "bedrock" in endpoint.lower():
+            region = bedrock_region(endpoint)
+            
+            if not api_key and not (BEDROCK_USE_AWS_CREDENTIALS and get_session is not None):
+                raise Exception("Bedrock API key is required. Get one from AWS Console → Bedrock → API Keys")
+            
+            return await self.call_bedrock(model, prompt, api_key, region, max_retries, image_data, system)
+        
+        logger.debug("Calling LLM - endpoint: %s, model: %s", endpoint, model)
+        
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        
+        payload = self._build_payload(endpoint, model, prompt, image_data, system)
+        
+        data = await self._post_with_retry(endpoint, json=payload, headers=headers, api_key=api_key, max_retries=max_retries)
+        logger.debug("Response keys: %s", data.keys())
+        
+        # Parse response based on format
+        if "choices" in data:
+            content = data["choices"][0]["message"]["content"]
+            logger.debug("Extracted content (first 200 chars): %.200s", content)
+            return content
+        elif "response" in data:
+            content = data["response"]
+            logger.debug("Ollama raw response type: %s, length: %s", type(content), len(content))
+            logger.debug("Ollama response (first 500 chars): '%.500s'", content)
+            if not content or content.strip() == "":
+                logger.warning("Ollama returned empty response!")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Full Ollama response data: %s", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+            return content
+        else:
+            logger.debug("Unexpected response format: %s", data)
+            return str(data)
+    
+    async def call_llm_stream(self, config: Union[Dict, Any], prompt: str, image_data: str = None, system: str = None) -> AsyncIterator[str]:
+        """Stream text deltas from an LLM endpoint as they are generated (no retries or caching)"""
+        endpoint, model, api_key, endpoint_type = self._config_fields(config)
+        
+        if endpoint_type == "bedrock" or "bedrock" in endpoint.lower():
+            if not api_key:
+                raise Exception("Bedrock API key is required. Get one from AWS Console → Bedrock → API Keys")
+            region = bedrock_region(endpoint)
+            family = _family(model)
+            url = f"https://bedrock-runtime.{region}.amazonaws.com/model/{model}/invoke-with-response-stream"
+            body = _REQUEST_BUILDERS[family](prompt, system, image_data)
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/vnd.amazon.eventstream",
+                "Authorization": f"Bearer {api_key}"
+            }
+            logger.debug("Streaming from Bedrock - model: %s, region: %s", model, region)
+            async with self._sem(url, api_key):
+                async with self._client.stream("POST", url, content=orjson.dumps(body), headers=headers, timeout=LLM_TIMEOUT) as response:
+                    if response.status_code >= 400:
+                        await response.aread()
+                        response.raise_for_status()
+                    buffer = bytearray()
+                    async for data in response.aiter_bytes():
+                        buffer.extend(data)
+                        for event_headers, payload in _pop_event_stream_messages(buffer):
+                            if event_headers.get(":message-type") == "exception":
+                                raise Exception(f"Bedrock stream error: {payload.decode(errors='replace')}")
+                            if event_headers.get(":event-type") != "chunk":
+                                continue
+                            chunk = orjson.loads(base64.b64decode(orjson.loads(payload)["bytes"]))
+                            text = _STREAM_PARSERS[family](chunk)
+                            if text:
+                                yield text
+            return
+        
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        payload = self._build_payload(endpoint, model, prompt, image_data, system)
+        payload["stream"] = True
+        logger.debug("Streaming from %s - model: %s", endpoint, model)
+        
+        async with self._sem(endpoint, api_key):
+            async with self._client.stream("POST", endpoint, content=orjson.dumps(payload), headers=headers, timeout=LLM_TIMEOUT) as response:
+                if response.status_code >= 400:
+                    await response.aread()
                     response.raise_for_status()
-                    data = response.json()
-                    print(f"DEBUG: Response keys: {data.keys()}")
-                    
-                    # Parse response based on format
-                    if "choices" in data:
-                        content = data["choices"][0]["message"]["content"]
-                        print(f"DEBUG: Extracted content (first 200 chars): {content[:200]}")
-                        return content
-                    elif "response" in data:
-                        content = data["response"]
-                        print(f"DEBUG: Ollama raw response type: {type(content)}, length: {len(content)}")
-                        print(f"DEBUG: Ollama response (first 500 chars): '{content[:500]}'")
-                        if not content or content.strip() == "":
-                            print(f"DEBUG: WARNING - Ollama returned empty response!")
-                            print(f"DEBUG: Full Ollama response data: {json.dumps(data, indent=2)}")
-                        return content
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    if "messages" in payload:
+                        # OpenAI-compatible SSE: "data: {...}" lines terminated by "data: [DONE]"
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        choices = orjson.loads(data).get("choices") or [{}]
+                        text = (choices[0].get("delta") or {}).get("content")
                     else:
-                        print(f"DEBUG: Unexpected response format: {data}")
-                        return str(data)
-                        
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) * 2
-                    print(f"DEBUG: Rate limited (429). Waiting {wait_time}s before retry...")
-                    await asyncio.sleep(wait_time)
-                    continue
-                print(f"DEBUG: HTTP Error calling LLM: {str(e)}")
-                raise
-            except Exception as e:
-                print(f"DEBUG: Error calling LLM: {str(e)}")
-                raise
-        
-        raise Exception(f"Failed after {max_retries} attempts")
+                        # Ollama: one JSON object per line
+                        chunk = orjson.loads(line)
+                        text = chunk.get("response")
+                        if chunk.get("done"):
+                            if text:
+                                yield text
+                            break
+                    if text:
+                        yield text
     
     async def call_participant(self, participant_index: int, participant: Union[Dict, Any], prompt: str, image_data: str = None) -> Dict[str, Any]:
         """Call a single participant and return structured response"""
         try:
             response = await self.call_llm(participant, prompt, image_data=image_data)
-            print(f"DEBUG: Participant {participant_index} response length: {len(response)} chars")
+            logger.debug("Participant %s response length: %s chars", participant_index, len(response))
             return {
                 "participant": participant_index,
                 "response": response,
                 "error": None
             }
         except Exception as e:
-            print(f"ERROR: Participant {participant_index} failed: {str(e)}")
+            logger.error("Participant %s failed: %s", participant_index, e)
             return {
                 "participant": participant_index,
                 "response": f"[Error: {str(e)}]",
@@ -336,38 +707,38 @@ class ConsensusEngine:
         # Extract just the user's original question without file content for cleaner ranking prompt
         base_prompt = original_prompt.split("\n\n--- Attached File:")[0] if "--- Attached File:" in original_prompt else original_prompt
         
-        ranking_prompt = f"""Original prompt: {base_prompt}
-
-Here are 3 responses from different AI models:
-
-Response A: {responses[0]["response"]}
-
-Response B: {responses[1]["response"]}
-
-Response C: {responses[2]["response"]}
-
-Rank these responses from best to worst (1=best, 3=worst) based on accuracy, helpfulness, and clarity.
-Respond ONLY with a JSON object in this exact format:
-{{"rankings": {{"A": 1, "B": 2, "C": 3}}, "reasoning": "brief explanation"}}"""
+        ranking_prompt = RANKING_TEMPLATE.format(
+            prompt=base_prompt,
+            a=_truncate(responses[0]["response"]),
+            b=_truncate(responses[1]["response"]),
+            c=_truncate(responses[2]["response"])
+        )
         
         try:
-            ranking_response = await self.call_llm(participant, ranking_prompt)
+            ranking_response = await self.call_llm(participant, ranking_prompt, system=RANKING_SYSTEM_PROMPT)
             return {
                 "participant": participant_index,
                 "ranking": ranking_response,
+                "parsed_rankings": _parse_rankings(ranking_response),
                 "error": None
             }
         except Exception as e:
-            print(f"ERROR: Participant {participant_index} ranking failed: {str(e)}")
+            logger.error("Participant %s ranking failed: %s", participant_index, e)
             return {
                 "participant": participant_index,
                 "ranking": f"[Error: {str(e)}]",
+                "parsed_rankings": None,
                 "error": str(e)
             }
     
-    async def run(self, prompt: str, participants: List[Union[Dict, Any]], chairman: Union[Dict, Any], file_content: Any = None) -> Dict[str, Any]:
-        """Run the consensus process with parallel requests"""
-        
+    async def _ranking_after(self, responses_ready: "asyncio.Future[List[Dict]]", participant_index: int, participant: Union[Dict, Any], original_prompt: str) -> Dict[str, Any]:
+        """Wait for the shared set of initial responses, then run this participant's ranking"""
+        responses = await responses_ready
+        return await self.call_ranking(participant_index, participant, original_prompt, responses)
+    
+    @staticmethod
+    def _prepare_prompt(prompt: str, file_content: Any = None) -> Tuple[str, str]:
+        """Return the full participant prompt and any image data for the attached file"""
         # Prepare the full prompt with file content if provided
         full_prompt = prompt
         image_data = None
@@ -394,59 +765,112 @@ Respond ONLY with a JSON object in this exact format:
                 file_info += "--- End of File ---\n"
                 full_prompt = prompt + file_info
         
-        # Step 1: Get initial responses from all participants IN PARALLEL
-        print("Step 1: Getting initial responses (parallel)...")
+        return full_prompt, image_data
+    
+    @staticmethod
+    def _chairman_base_prompt(prompt: str, file_content: Any = None) -> str:
+        """Original prompt as shown to the chairman, available before any participant has answered"""
+        # Use base prompt for chairman (without full file content to keep it concise)
+        return prompt if not file_content else f"{prompt}\n[Note: Responses were based on analysis of attached file: {file_content.name}]"
+    
+    @staticmethod
+    def _chairman_prompt(base_prompt: str, responses: List[Dict], rankings: List[Dict]) -> str:
+        return CHAIRMAN_TEMPLATE.format(
+            prompt=base_prompt,
+            a=_truncate(responses[0]["response"]),
+            b=_truncate(responses[1]["response"]),
+            c=_truncate(responses[2]["response"]),
+            ranking_1=_format_rankings(rankings[0]),
+            ranking_2=_format_rankings(rankings[1]),
+            ranking_3=_format_rankings(rankings[2])
+        )
+    
+    async def _call_chairman(self, chairman: Union[Dict, Any], chairman_prompt: str) -> str:
+        """Call the chairman with extra retries and longer backoff, returning an error string on failure"""
+        max_chairman_retries = 5
+        for attempt in range(max_chairman_retries):
+            try:
+                return await self.call_llm(chairman, chairman_prompt, max_retries=3, system=CHAIRMAN_SYSTEM_PROMPT)
+            except Exception as e:
+                if attempt < max_chairman_retries - 1:
+                    wait_time = _backoff(attempt, factor=3)  # up to 3, 6, 12, 24, 48 seconds
+                    logger.warning("Chairman failed (attempt %s/%s). Waiting %.1fs before retry...", attempt + 1, max_chairman_retries, wait_time)
+                    await asyncio.sleep(wait_time)
+                else:
+                    logger.error("Chairman failed after %s attempts", max_chairman_retries)
+                    return f"[Error generating consensus: {str(e)}]"
+    
+    async def _min_similarity(self, responses: List[Dict]) -> float:
+        """Lowest pairwise cosine similarity between the responses (embeddings are normalized)"""
+        vectors = await asyncio.gather(*(self._embeddings.embed(r["response"]) for r in responses))
+        return min(
+            float((vectors[i] * vectors[j]).sum())
+            for i in range(len(vectors)) for j in range(i + 1, len(vectors))
+        )
+    
+    async def _consensus_shortcut(self, responses: List[Dict], rankings: List[Dict]) -> Optional[str]:
+        """Final output when the consensus is already obvious, so the chairman call can be skipped"""
+        winner = _unanimous_winner(rankings)
+        if winner is not None:
+            reason = f"all three participants ranked Response {winner} first"
+        elif (self._embeddings is not None and not any(r["error"] for r in responses)
+              and any(r.get("parsed_rankings") for r in rankings)):
+            # Rankings disagree, but the answers themselves may be the same; at least one parsed
+            # ranking is needed to say which response ranked highest
+            try:
+                similarity = await self._min_similarity(responses)
+            except Exception as e:
+                logger.warning("Response similarity check failed: %s", e)
+                return None
+            if similarity < CONSENSUS_SIMILARITY_THRESHOLD:
+                return None
+            scores = _borda_scores(rankings)
+            winner = max(scores, key=scores.get)
+            reason = f"all three responses were near-identical (similarity {similarity:.2f}) and Response {winner} ranked highest"
+        else:
+            return None
+        
+        response = responses[RESPONSE_LABELS.index(winner)]
+        if response["error"]:
+            return None
+        logger.info("Consensus shortcut: %s, skipping chairman", reason)
+        return f"{response['response']}\n\n---\n*Consensus: {reason}, so it was used directly without chairman synthesis.*"
+    
+    def _schedule_rounds(self, full_prompt: str, participants: List[Union[Dict, Any]], image_data: str = None):
+        """Create the participant and ranking tasks; each ranking starts as soon as all responses are in"""
         response_tasks = [
-            self.call_participant(i, participant, full_prompt, image_data)
+            asyncio.create_task(self.call_participant(i, participant, full_prompt, image_data))
             for i, participant in enumerate(participants)
         ]
-        responses = await asyncio.gather(*response_tasks)
-        print(f"DEBUG: Total responses collected: {len(responses)}")
-        
-        # Step 2: Have each participant rank all responses IN PARALLEL
-        print("Step 2: Getting rankings (parallel)...")
+        responses_ready = asyncio.gather(*response_tasks)
         ranking_tasks = [
-            self.call_ranking(i, participant, full_prompt, responses)
+            asyncio.create_task(self._ranking_after(responses_ready, i, participant, full_prompt))
             for i, participant in enumerate(participants)
         ]
-        rankings = await asyncio.gather(*ranking_tasks)
+        return response_tasks, responses_ready, ranking_tasks
+    
+    async def run(self, prompt: str, participants: List[Union[Dict, Any]], chairman: Union[Dict, Any], file_content: Any = None) -> Dict[str, Any]:
+        """Run the consensus process with parallel requests"""
+        full_prompt, image_data = self._prepare_prompt(prompt, file_content)
         
-        # Step 3: Chairman reviews and creates final output WITH RETRY
-        print("Step 3: Chairman creating consensus...")
-        # Use base prompt for chairman (without full file content to keep it concise)
-        base_prompt = prompt if not file_content else f"{prompt}\n[Note: Responses were based on analysis of attached file: {file_content.name}]"
+        # Step 1 and 2: initial responses IN PARALLEL, then rankings IN PARALLEL;
+        # ranking tasks are scheduled up front and start the moment all responses land
+        logger.info("Step 1/2: Getting initial responses, then rankings (parallel)...")
+        _, responses_ready, ranking_tasks = self._schedule_rounds(full_prompt, participants, image_data)
         
-        chairman_prompt = f"""You are the chairman reviewing a consensus process.
-
-Original prompt: {base_prompt}
-
-Three AI models provided these responses:
-Response A: {responses[0]["response"]}
-Response B: {responses[1]["response"]}
-Response C: {responses[2]["response"]}
-
-Each model ranked all responses:
-Participant 1 rankings: {rankings[0]["ranking"]}
-Participant 2 rankings: {rankings[1]["ranking"]}
-Participant 3 rankings: {rankings[2]["ranking"]}
-
-Based on the responses and rankings, create a consolidated final answer that represents the best consensus.
-Include a brief explanation of how you synthesized the responses."""
+        # Prepare the chairman's view of the prompt while participants are still working
+        chairman_base_prompt = self._chairman_base_prompt(prompt, file_content)
         
-        # Chairman gets extra retries and longer backoff
-        max_chairman_retries = 5
-        for attempt in range(max_chairman_retries):
-            try:
-                final_output = await self.call_llm(chairman, chairman_prompt, max_retries=3)
-                break
-            except Exception as e:
-                if attempt < max_chairman_retries - 1:
-                    wait_time = (2 ** attempt) * 3  # 3, 6, 12, 24, 48 seconds
-                    print(f"WARNING: Chairman failed (attempt {attempt + 1}/{max_chairman_retries}). Waiting {wait_time}s before retry...")
-                    await asyncio.sleep(wait_time)
-                else:
-                    print(f"ERROR: Chairman failed after {max_chairman_retries} attempts")
-                    final_output = f"[Error generating consensus: {str(e)}]"
+        responses = await responses_ready
+        logger.debug("Total responses collected: %s", len(responses))
+        rankings = await asyncio.gather(*ranking_tasks)
+        
+        # Step 3: Chairman reviews and creates final output WITH RETRY (unless consensus is already clear)
+        logger.info("Step 3: Chairman creating consensus...")
+        final_output = await self._consensus_shortcut(responses, rankings)
+        if final_output is None:
+            chairman_prompt = self._chairman_prompt(chairman_base_prompt, responses, rankings)
+            final_output = await self._call_chairman(chairman, chairman_prompt)
         
         result = {
             "prompt": prompt,
@@ -455,5 +879,47 @@ Include a brief explanation of how you synthesized the responses."""
             "final_output": final_output
         }
         
-        print(f"DEBUG: Returning result with {len(result['responses'])} responses, {len(result['rankings'])} rankings")
+        logger.debug("Returning result with %s responses, %s rankings", len(result['responses']), len(result['rankings']))
         return result
+    
+    async def run_stream(self, prompt: str, participants: List[Union[Dict, Any]], chairman: Union[Dict, Any], file_content: Any = None) -> AsyncIterator[str]:
+        """Run the consensus process, yielding server-sent events as each stage produces output"""
+        full_prompt, image_data = self._prepare_prompt(prompt, file_content)
+        response_tasks, responses_ready, ranking_tasks = self._schedule_rounds(full_prompt, participants, image_data)
+        chairman_base_prompt = self._chairman_base_prompt(prompt, file_content)
+        
+        try:
+            # Emit each participant's response and ranking as soon as it completes
+            for task in asyncio.as_completed(response_tasks):
+                yield _sse("response", await task)
+            responses = await responses_ready
+            for task in asyncio.as_completed(ranking_tasks):
+                yield _sse("ranking", await task)
+            rankings = [task.result() for task in ranking_tasks]
+        finally:
+            for task in response_tasks + ranking_tasks:
+                task.cancel()
+        
+        final_output = await self._consensus_shortcut(responses, rankings)
+        if final_output is not None:
+            yield _sse("chairman", {"text": final_output})
+        else:
+            chairman_prompt = self._chairman_prompt(chairman_base_prompt, responses, rankings)
+            chunks = []
+            try:
+                async for text in self.call_llm_stream(chairman, chairman_prompt, system=CHAIRMAN_SYSTEM_PROMPT):
+                    chunks.append(text)
+                    yield _sse("chairman_delta", {"text": text})
+                final_output = "".join(chunks)
+            except Exception as e:
+                # Fall back to the buffered call (with its retries); clients replace any partial text
+                logger.warning("Chairman stream failed: %s. Falling back to non-streaming call", e)
+                final_output = await self._call_chairman(chairman, chairman_prompt)
+                yield _sse("chairman", {"text": final_output})
+        
+        yield _sse("done", {
+            "prompt": prompt,
+            "responses": responses,
+            "rankings": rankings,
+            "final_output": final_output
+        })
@@ -1,19 +1,86 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Body, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
+from typing import AsyncIterator, List, Optional, Dict, Tuple
+from typing_extensions import Annotated
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
 import httpx
+import logging
+import orjson
 import os
-from consensus import ConsensusEngine
+import sys
+import weakref
+from cachetools import TTLCache
+from consensus import ConsensusEngine, bedrock_regions
+from middleware import RateLimiter, SecurityMiddleware
+
+try:
+    # Optional: faster transport for bursts of /api/models lookups
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    # Optional: incremental parsing of large model listings
+    import ijson
+except ImportError:
+    ijson = None
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared client so connections and TLS sessions are reused across requests
+    # HTTP/2 multiplexes the consensus fan-out over one connection per provider; pool and
+    # HTTP/2 settings live on the transport, which also retries failed connection attempts once
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100, keepalive_expiry=60.0),
+            retries=1
+        )
+    )
+    # One engine for the whole app lifetime; its LLM calls share the same connection pool
+    app.state.engine = ConsensusEngine(client=app.state.http)
+    app.state.aio = None
+    if aiohttp is not None:
+        app.state.aio = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=1000, limit_per_host=100, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+    # Share rate-limit counts across workers through Redis when configured
+    app.state.redis = None
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        import redis.asyncio as redis
+        # Short timeouts so an unreachable Redis falls back to in-memory counts instead of stalling requests
+        app.state.redis = redis.from_url(redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        rate_limiter.use_redis(app.state.redis)
+    # Periodically drop idle clients from the in-memory rate limiter
+    cleanup = asyncio.create_task(rate_limiter.run_cleanup())
+    yield
+    cleanup.cancel()
+    if app.state.redis is not None:
+        await app.state.redis.close()
+    if app.state.aio is not None:
+        await app.state.aio.close()
+    await app.state.engine.aclose()
+    await app.state.http.aclose()
 
 app = FastAPI(
     title="LLM Consensus Builder API",
     description="API for building consensus from multiple LLMs",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Get allowed origins from environment variable or use defaults
@@ -26,10 +93,10 @@ ALLOWED_ORIGINS = os.getenv(
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,  # Restrict to specific origins
-    allow_credentials=True,
+    allow_credentials=False,  # The frontend sends no cookies; API keys travel in the request body
     allow_methods=["GET", "POST"],  # Only allow necessary methods
     allow_headers=["Content-Type", "Authorization"],  # Only allow necessary headers
-    max_age=600,  # Cache preflight requests for 10 minutes
+    max_age=86400,  # Cache preflight requests for a day
 )
 
 # Trusted Host Middleware - prevent host header attacks
@@ -38,106 +105,60 @@ app.add_middleware(
     allowed_hosts=["localhost", "127.0.0.1", "*.localhost"]
 )
 
-# Security Headers Middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    
-    # Prevent clickjacking
-    response.headers["X-Frame-Options"] = "DENY"
-    
-    # Prevent MIME type sniffing
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    
-    # Enable XSS protection
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    
-    # Strict Transport Security (HTTPS only - uncomment when using HTTPS)
-    # response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    
-    # Content Security Policy
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline'; "
-        "style-src 'self' 'unsafe-inline'; "
-        "img-src 'self' data: https:; "
-        "connect-src 'self' https://openrouter.ai https://bedrock-runtime.*.amazonaws.com https://bedrock.*.amazonaws.com http://localhost:* http://127.0.0.1:*; "
-        "font-src 'self'; "
-        "object-src 'none'; "
-        "base-uri 'self'; "
-        "form-action 'self'; "
-        "frame-ancestors 'none'; "
-        "upgrade-insecure-requests;"
-    )
-    
-    # Referrer Policy
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    
-    # Permissions Policy (formerly Feature Policy)
-    response.headers["Permissions-Policy"] = (
-        "geolocation=(), "
-        "microphone=(), "
-        "camera=(), "
-        "payment=(), "
-        "usb=(), "
-        "magnetometer=(), "
-        "gyroscope=(), "
-        "accelerometer=()"
-    )
-    
-    return response
-
-# Rate limiting helper (basic implementation)
-from collections import defaultdict
-from datetime import datetime, timedelta
-
-request_counts = defaultdict(list)
+# Rate limiting (in-memory, or shared through Redis when REDIS_URL is set)
 RATE_LIMIT = 100  # requests per window
-RATE_WINDOW = timedelta(minutes=15)
+RATE_WINDOW = 15 * 60  # seconds
+rate_limiter = RateLimiter(RATE_LIMIT, RATE_WINDOW)
+# Only trust X-Forwarded-For behind a proxy that sets it, otherwise clients could pick their own key
+TRUST_X_FORWARDED_FOR = os.getenv("TRUST_X_FORWARDED_FOR", "false").lower() == "true"
+# Security headers and rate limiting share one layer so a Redis check overlaps with routing
+app.add_middleware(SecurityMiddleware, limiter=rate_limiter, trust_forwarded_for=TRUST_X_FORWARDED_FOR)
 
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    # Get client IP
-    client_ip = request.client.host
-    
-    # Clean old requests
-    now = datetime.now()
-    request_counts[client_ip] = [
-        req_time for req_time in request_counts[client_ip]
-        if now - req_time < RATE_WINDOW
-    ]
-    
-    # Check rate limit
-    if len(request_counts[client_ip]) >= RATE_LIMIT:
-        return JSONResponse(
-            status_code=429,
-            content={"detail": "Rate limit exceeded. Please try again later."}
-        )
-    
-    # Add current request
-    request_counts[client_ip].append(now)
-    
-    response = await call_next(request)
-    return response
+# Request models are read-only once validated; unknown fields are dropped
+REQUEST_MODEL_CONFIG = ConfigDict(extra="ignore", frozen=True)
+
+# Uploads larger than this (text or base64 data URL) are rejected during validation
+MAX_FILE_CONTENT_LENGTH = 10_000_000
 
 class LLMConfig(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     endpoint: str
     model: str
     api_key: Optional[str] = None
     type: Optional[str] = "openai"  # openai, ollama, bedrock
 
 class FileContent(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     name: str
     type: str
-    content: str
+    content: str = Field(..., max_length=MAX_FILE_CONTENT_LENGTH)
+    
+    @field_validator("content")
+    @classmethod
+    def drop_unused_payload(cls, content: str, info: ValidationInfo) -> str:
+        """Keep only the data URL header for binary non-image files, whose payload is never sent to a model"""
+        file_type = info.data.get("type", "")
+        is_image = file_type.startswith("image/") and content.startswith("data:image")
+        is_text = file_type.startswith("text/") or file_type == "application/json"
+        if content.startswith("data:") and not is_image and not is_text:
+            comma = content.find(",")
+            if comma != -1:
+                return content[:comma + 1]
+        return content
 
 class ConsensusRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     prompt: str
     participants: List[LLMConfig]
     chairman: LLMConfig
     file: Optional[FileContent] = None
 
 class ModelsRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     endpoint_url: str
     api_key: Optional[str] = None
     type: str = "openai"
@@ -148,138 +169,253 @@ async def generate_consensus(request: ConsensusRequest):
     if len(request.participants) != 3:
         raise HTTPException(status_code=400, detail="Exactly 3 participants required")
     
-    engine = ConsensusEngine()
-    result = await engine.run(request.prompt, request.participants, request.chairman, request.file)
+    result = await app.state.engine.run(request.prompt, request.participants, request.chairman, request.file)
     return result
 
+@app.post("/api/consensus/stream")
+async def generate_consensus_stream(request: ConsensusRequest):
+    """Run the consensus process, streaming each stage as server-sent events"""
+    if len(request.participants) != 3:
+        raise HTTPException(status_code=400, detail="Exactly 3 participants required")
+    
+    return StreamingResponse(
+        app.state.engine.run_stream(request.prompt, request.participants, request.chairman, request.file),
+        media_type="text/event-stream"
+    )
+
+# Model and inference-profile lists change rarely, so repeat lookups are served from memory
+MODELS_CACHE_TTL = int(os.getenv("MODELS_CACHE_TTL", "600"))
+# Entries hold the sorted "all" list and the precomputed "free" (OpenRouter ":free") list
+_models_cache: "TTLCache[Tuple[str, str, bytes], Dict[str, List[str]]]" = TTLCache(maxsize=256, ttl=MODELS_CACHE_TTL)
+# Per-key locks so simultaneous lookups for the same endpoint make a single upstream call
+_models_locks: "weakref.WeakValueDictionary[Tuple[str, str, bytes], asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Common inference profiles, returned when the Bedrock API call fails or returns nothing
+BEDROCK_FALLBACK_PROFILES: Tuple[str, ...] = tuple(sorted([
+    # Cross-region inference profiles (recommended)
+    'us.anthropic.claude-3-5-sonnet-20241022-v2:0',
+    'us.anthropic.claude-3-5-haiku-20241022-v1:0',
+    'us.anthropic.claude-3-opus-20240229-v1:0',
+    'us.anthropic.claude-3-sonnet-20240229-v1:0',
+    'us.anthropic.claude-3-haiku-20240307-v1:0',
+    'us.meta.llama3-3-70b-instruct-v1:0',
+    'us.meta.llama3-2-90b-instruct-v1:0',
+    'us.meta.llama3-2-11b-instruct-v1:0',
+    'us.mistral.mistral-large-2407-v1:0',
+    'us.amazon.nova-pro-v1:0',
+    'us.amazon.nova-lite-v1:0',
+    'us.amazon.nova-micro-v1:0',
+    # Region-specific model IDs (fallback)
+    'anthropic.claude-3-5-sonnet-20241022-v2:0',
+    'anthropic.claude-3-5-haiku-20241022-v1:0',
+    'meta.llama3-3-70b-instruct-v1:0',
+    'amazon.titan-text-premier-v1:0'
+]))
+_BEDROCK_FALLBACK_LISTS = {"all": list(BEDROCK_FALLBACK_PROFILES)}
+_BEDROCK_FALLBACK_LISTS["free"] = _BEDROCK_FALLBACK_LISTS["all"]
+
+async def _get_json(url: str, headers: Optional[Dict[str, str]] = None):
+    """GET a JSON document via the aiohttp session when installed, otherwise the shared httpx client"""
+    if app.state.aio is not None:
+        async with app.state.aio.get(url, headers=headers) as response:
+            logger.debug("GET %s -> %s", url, response.status)
+            if response.status >= 400 and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Error response: %.500s", await response.text())
+            response.raise_for_status()
+            return orjson.loads(await response.read())
+    
+    response = await app.state.http.get(url, headers=headers)
+    logger.debug("GET %s -> %s", url, response.status_code)
+    if response.status_code >= 400 and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Error response: %.500s", response.text)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+async def _iter_body(url: str, headers: Optional[Dict[str, str]] = None) -> AsyncIterator[bytes]:
+    """GET a response body in chunks as they arrive"""
+    if app.state.aio is not None:
+        async with app.state.aio.get(url, headers=headers) as response:
+            logger.debug("GET %s -> %s", url, response.status)
+            response.raise_for_status()
+            async for chunk in response.content.iter_any():
+                yield chunk
+        return
+    
+    async with app.state.http.stream("GET", url, headers=headers) as response:
+        logger.debug("GET %s -> %s", url, response.status_code)
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            yield chunk
+
+async def _stream_model_ids(url: str, headers: Optional[Dict[str, str]] = None) -> List[str]:
+    """Parse an OpenAI-compatible model listing incrementally, keeping only the IDs (requires ijson)"""
+    # {"data": [{"id": ...}, ...]} (OpenAI/OpenRouter) or {"models": ["...", ...]}
+    ids: Dict[str, List[str]] = {"data.item.id": [], "models.item": []}
+    events = ijson.sendable_list()
+    parser = ijson.parse_coro(events)
+    async for chunk in _iter_body(url, headers):
+        parser.send(chunk)
+        for prefix, event, value in events:
+            if event == "string" and prefix in ids:
+                ids[prefix].append(value)
+        del events[:]
+    parser.close()
+    return ids["data.item.id"] or ids["models.item"]
+
+async def fetch_region_profiles(region: str, headers: Dict[str, str]) -> List[str]:
+    """Fetch inference profile IDs from Bedrock in one region, returning an empty list on failure"""
+    logger.debug("Fetching Bedrock inference profiles for region: %s", region)
+    
+    # Bedrock list inference profiles endpoint
+    endpoint = f"https://bedrock.{region}.amazonaws.com/inference-profiles"
+    
+    profiles = []
+    try:
+        data = await _get_json(endpoint, headers=headers)
+        
+        # Extract inference profile IDs from response
+        if "inferenceProfileSummaries" in data:
+            for profile in data["inferenceProfileSummaries"]:
+                profile_id = profile.get("inferenceProfileId") or profile.get("inferenceProfileArn")
+                if profile_id:
+                    profiles.append(profile_id)
+        
+        logger.debug("Found %s Bedrock inference profiles in %s", len(profiles), region)
+    except Exception as e:
+        logger.debug("Bedrock API call failed for %s: %s", region, e)
+    
+    return profiles
+
+async def fetch_bedrock_profiles(request: ModelsRequest) -> List[str]:
+    """Fetch inference profile IDs from every region in the endpoint concurrently, returning an empty list on failure"""
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {request.api_key}"
+    }
+    results = await asyncio.gather(*(fetch_region_profiles(region, headers) for region in bedrock_regions(request.endpoint_url)))
+    # Cross-region profiles are listed in each of their regions, so dedupe while merging
+    return list(dict.fromkeys(profile for profiles in results for profile in profiles))
+
+def _model_lists(request: ModelsRequest, models: List[str]) -> Dict[str, List[str]]:
+    """Sort once and precompute the free-only list (OpenRouter specific) when populating the cache"""
+    # models is always a freshly built list, so sort it in place
+    models.sort()
+    if request.type not in ("bedrock", "ollama") and "openrouter" in request.endpoint_url:
+        free = [m for m in models if m.endswith(":free")]
+        logger.debug("Free models found: %s of %s", len(free), len(models))
+    else:
+        free = models
+    return {"all": models, "free": free}
+
+async def fetch_models(request: ModelsRequest) -> Dict[str, List[str]]:
+    """Fetch the model lists for an endpoint, served from the TTL cache when fresh"""
+    # Both the full and free-only lists are cached, so free_only doesn't need to be part of the key
+    cache_key = (request.type, request.endpoint_url, hashlib.blake2b((request.api_key or "").encode()).digest())
+    lists = _models_cache.get(cache_key)
+    if lists is not None:
+        logger.debug("Models cache hit for %s", request.endpoint_url)
+        return lists
+    
+    lock = _models_locks.get(cache_key)
+    if lock is None:
+        lock = _models_locks[cache_key] = asyncio.Lock()
+    async with lock:
+        # Another request may have filled the cache while this one waited
+        lists = _models_cache.get(cache_key)
+        if lists is None:
+            lists = await _fetch_model_lists(request)
+            # Fallback list is not cached so the next request retries the API
+            if lists is not _BEDROCK_FALLBACK_LISTS:
+                _models_cache[cache_key] = lists
+    return lists
+
+async def _fetch_model_lists(request: ModelsRequest) -> Dict[str, List[str]]:
+    """Query the endpoint for its models and build the sorted and free-only lists"""
+    if request.type == "bedrock":
+        # AWS Bedrock models discovery
+        if not request.api_key:
+            raise HTTPException(status_code=400, detail="API key required for Bedrock")
+        
+        profiles = await fetch_bedrock_profiles(request)
+        if not profiles:
+            return _BEDROCK_FALLBACK_LISTS
+        models = profiles
+    elif request.type == "ollama":
+        # Ollama models endpoint
+        data = await _get_json(f"{request.endpoint_url}/api/tags")
+        models = [model["name"] for model in data.get("models", [])]
+    else:
+        # OpenAI-compatible models endpoint
+        headers = {"Content-Type": "application/json"}
+        if request.api_key:
+            headers["Authorization"] = f"Bearer {request.api_key}"
+        
+        if ijson is not None:
+            models = await _stream_model_ids(f"{request.endpoint_url}/models", headers=headers)
+        else:
+            data = await _get_json(f"{request.endpoint_url}/models", headers=headers)
+            
+            # Handle different response formats
+            if "data" in data:
+                models = [model["id"] for model in data["data"]]
+            elif "models" in data:
+                models = data["models"]
+            else:
+                models = []
+    
+    return _model_lists(request, models)
+
+async def list_models(request: ModelsRequest) -> List[str]:
+    """Model list for a request, with the OpenRouter free-only filter applied"""
+    lists = await fetch_models(request)
+    return lists["free" if request.free_only else "all"]
+
 @app.post("/api/models")
 async def get_models(request: ModelsRequest):
     """Fetch available models from an endpoint"""
-    print(f"DEBUG: Received request - endpoint_url: {request.endpoint_url}, type: {request.type}, free_only: {request.free_only}")
+    logger.debug("Received request - endpoint_url: %s, type: %s, free_only: %s", request.endpoint_url, request.type, request.free_only)
     try:
-        if request.type == "bedrock":
-            # AWS Bedrock models discovery
-            if not request.api_key:
-                raise HTTPException(status_code=400, detail="API key required for Bedrock")
-            
-            # Extract region from endpoint_url
-            region = "us-east-1"
-            if "region=" in request.endpoint_url:
-                region = request.endpoint_url.split("region=")[1].split("&")[0]
-            
-            print(f"DEBUG: Fetching Bedrock inference profiles for region: {region}")
-            
-            # Bedrock list inference profiles endpoint
-            endpoint = f"https://bedrock.{region}.amazonaws.com/inference-profiles"
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {request.api_key}"
-            }
-            
-            profiles = []
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(endpoint, headers=headers)
-                    print(f"DEBUG: Bedrock profiles response status: {response.status_code}")
-                    
-                    if response.status_code >= 400:
-                        try:
-                            error_body = response.json()
-                            print(f"DEBUG: Bedrock error: {error_body}")
-                        except:
-                            print(f"DEBUG: Bedrock error text: {response.text[:500]}")
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Extract inference profile IDs from response
-                    if "inferenceProfileSummaries" in data:
-                        for profile in data["inferenceProfileSummaries"]:
-                            profile_id = profile.get("inferenceProfileId") or profile.get("inferenceProfileArn")
-                            profile_name = profile.get("inferenceProfileName", "")
-                            if profile_id:
-                                # Include profile name in display if available
-                                display = f"{profile_id}"
-                                if profile_name:
-                                    display = f"{profile_name} ({profile_id})"
-                                profiles.append(profile_id)
-                    
-                    print(f"DEBUG: Found {len(profiles)} Bedrock inference profiles")
-            except Exception as e:
-                print(f"DEBUG: Bedrock API call failed: {str(e)}, returning default profiles")
-            
-            # If API call fails or returns nothing, return common inference profiles
-            if not profiles:
-                profiles = [
-                    # Cross-region inference profiles (recommended)
-                    'us.anthropic.claude-3-5-sonnet-20241022-v2:0',
-                    'us.anthropic.claude-3-5-haiku-20241022-v1:0',
-                    'us.anthropic.claude-3-opus-20240229-v1:0',
-                    'us.anthropic.claude-3-sonnet-20240229-v1:0',
-                    'us.anthropic.claude-3-haiku-20240307-v1:0',
-                    'us.meta.llama3-3-70b-instruct-v1:0',
-                    'us.meta.llama3-2-90b-instruct-v1:0',
-                    'us.meta.llama3-2-11b-instruct-v1:0',
-                    'us.mistral.mistral-large-2407-v1:0',
-                    'us.amazon.nova-pro-v1:0',
-                    'us.amazon.nova-lite-v1:0',
-                    'us.amazon.nova-micro-v1:0',
-                    # Region-specific model IDs (fallback)
-                    'anthropic.claude-3-5-sonnet-20241022-v2:0',
-                    'anthropic.claude-3-5-haiku-20241022-v1:0',
-                    'meta.llama3-3-70b-instruct-v1:0',
-                    'amazon.titan-text-premier-v1:0'
-                ]
-            
-            return {"models": sorted(profiles)}
-            
-        elif request.type == "ollama":
-            # Ollama models endpoint
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(f"{request.endpoint_url}/api/tags")
-                response.raise_for_status()
-                data = response.json()
-                models = [model["name"] for model in data.get("models", [])]
-                return {"models": models}
-        else:
-            # OpenAI-compatible models endpoint
-            headers = {"Content-Type": "application/json"}
-            if request.api_key:
-                headers["Authorization"] = f"Bearer {request.api_key}"
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{request.endpoint_url}/models",
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Handle different response formats
-                if "data" in data:
-                    models_data = data["data"]
-                    models = [model["id"] for model in models_data]
-                    print(f"DEBUG: Total models before filter: {len(models)}")
-                    
-                    # Filter for free models if requested (OpenRouter specific)
-                    if request.free_only and "openrouter" in request.endpoint_url:
-                        print(f"DEBUG: Filtering for free models...")
-                        models = [m for m in models if m.endswith(":free")]
-                        print(f"DEBUG: Free models found: {len(models)}")
-                        print(f"DEBUG: Sample free models: {models[:5]}")
-                elif "models" in data:
-                    models = data["models"]
-                else:
-                    models = []
-                
-                return {"models": models}
+        return {"models": await list_models(request)}
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"DEBUG: Error occurred: {str(e)}")
+        logger.debug("Error occurred: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/health")
-async def health():
-    return {"status": "ok"}
+# Each batch entry can fan out to several upstream calls, so larger batches are rejected with 422
+MAX_MODELS_BATCH = 10
+
+@app.post("/api/models/batch")
+async def get_models_batch(requests: Annotated[List[ModelsRequest], Body(max_length=MAX_MODELS_BATCH)]):
+    """Fetch available models from several endpoints concurrently"""
+    results = await asyncio.gather(*(list_models(r) for r in requests), return_exceptions=True)
+    
+    batch = []
+    for result in results:
+        if isinstance(result, HTTPException):
+            batch.append({"models": [], "error": result.detail})
+        elif isinstance(result, Exception):
+            logger.debug("Error occurred: %s", result)
+            batch.append({"models": [], "error": str(result)})
+        else:
+            batch.append({"models": result})
+    return {"results": batch}
+
+# Health checks are polled constantly, so the response is pre-serialized and served as a
+# bare ASGI endpoint, skipping FastAPI's request parsing and response serialization
+HEALTH_BODY = b'{"status":"ok"}'
+HEALTH_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(HEALTH_BODY)).encode("latin-1")),
+]
+
+class HealthEndpoint:
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": list(HEALTH_HEADERS)})
+        await send({"type": "http.response.body", "body": HEALTH_BODY})
+
+# A class instance (not a function) makes Starlette route to it as a raw ASGI app
+app.router.add_route("/api/health", HealthEndpoint(), methods=["GET"])
 
 if __name__ == "__main__":
     import uvicorn
@@ -287,12 +423,20 @@ if __name__ == "__main__":
     # Get configuration from environment
     host = os.getenv("HOST", "127.0.0.1")  # Default to localhost only
     port = int(os.getenv("PORT", "8000"))
+    # Workers need the app as an import string. Each keeps its own rate-limit counts unless
+    # REDIS_URL is set, so default to one worker per core only when the limit is shared
+    default_workers = (os.cpu_count() or 1) if os.getenv("REDIS_URL") else 1
+    workers = int(os.getenv("WEB_CONCURRENCY") or default_workers)
     
     # Production settings
     uvicorn.run(
-        app, 
+        "main:app",
         host=host, 
         port=port,
+        workers=workers,
+        # libuv event loop and C HTTP parser; uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         log_level="info",
         access_log=True,
         timeout_keep_alive=300,  # 5 minutes for long-running consensus requests
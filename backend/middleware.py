@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Security headers added to every HTTP response
+SECURITY_HEADERS = {
+    # Prevent clickjacking
+    "X-Frame-Options": "DENY",
+    # Prevent MIME type sniffing
+    "X-Content-Type-Options": "nosniff",
+    # Enable XSS protection
+    "X-XSS-Protection": "1; mode=block",
+    # Strict Transport Security (HTTPS only - uncomment when using HTTPS)
+    # "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    # Content Security Policy
+    "Content-Security-Policy": (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline'; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data: https:; "
+        "connect-src 'self' https://openrouter.ai https://bedrock-runtime.*.amazonaws.com https://bedrock.*.amazonaws.com http://localhost:* http://127.0.0.1:*; "
+        "font-src 'self'; "
+        "object-src 'none'; "
+        "base-uri 'self'; "
+        "form-action 'self'; "
+        "frame-ancestors 'none'; "
+        "upgrade-insecure-requests;"
+    ),
+    # Referrer Policy
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    # Permissions Policy (formerly Feature Policy)
+    "Permissions-Policy": (
+        "geolocation=(), "
+        "microphone=(), "
+        "camera=(), "
+        "payment=(), "
+        "usb=(), "
+        "magnetometer=(), "
+        "gyroscope=(), "
+        "accelerometer=()"
+    ),
+}
+
+# Frozen once at import time into raw ASGI (name, value) byte pairs
+SECURITY_HEADER_PAIRS: Tuple[Tuple[bytes, bytes], ...] = tuple(
+    (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in SECURITY_HEADERS.items()
+)
+
+
+# Sliding-window check on a sorted set scored by timestamp; trim, count and add in one atomic step
+# KEYS[1] = rl:<ip>, ARGV = [window start ms, now ms, limit, window ms, unique member]
+_RATE_LIMIT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 1
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[5])
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return 0
+"""
+
+
+class RateLimiter:
+    """Sliding-window request counter per client IP, shared through Redis when configured"""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._hits: Dict[str, Deque[float]] = {}
+        self._script = None
+
+    @property
+    def shared(self) -> bool:
+        return self._script is not None
+
+    def use_redis(self, redis):
+        """Keep counts in Redis so every worker enforces the same limit"""
+        self._script = redis.register_script(_RATE_LIMIT_SCRIPT)
+
+    async def hit(self, key: str) -> bool:
+        """Record a request for key, returning False when it is over the limit"""
+        if self._script is not None:
+            now_ms = int(time.time() * 1000)
+            window_ms = int(self.window * 1000)
+            try:
+                limited = await self._script(
+                    keys=[f"rl:{key}"],
+                    args=[now_ms - window_ms, now_ms, self.limit, window_ms, f"{now_ms}:{os.urandom(6).hex()}"]
+                )
+                return not limited
+            except Exception as e:
+                # Stay available if Redis is down: fall back to this worker's own counts
+                logger.warning("Redis rate limit check failed, using in-memory counts: %s", e)
+        return self._hit_local(key)
+
+    def _hit_local(self, key: str) -> bool:
+        now = time.monotonic()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque(maxlen=self.limit)
+        while hits and now - hits[0] >= self.window:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            return False
+        hits.append(now)
+        return True
+
+    def prune(self):
+        """Forget clients with no requests inside the window"""
+        cutoff = time.monotonic() - self.window
+        for key in [key for key, hits in self._hits.items() if not hits or hits[-1] <= cutoff]:
+            del self._hits[key]
+
+    async def run_cleanup(self, interval: float = 60.0):
+        """Prune idle clients periodically so the table doesn't grow without bound"""
+        while True:
+            await asyncio.sleep(interval)
+            self.prune()
+
+
+_RATE_LIMITED_BODY = b'{"detail":"Rate limit exceeded. Please try again later."}'
+_RATE_LIMITED_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_RATE_LIMITED_BODY)).encode("latin-1")),
+]
+
+
+class _RateLimited(Exception):
+    """Aborts the inner app once a concurrent rate-limit check has denied the request"""
+
+
+class SecurityMiddleware:
+    """Pure ASGI middleware applying the rate limit and adding the security headers in one layer"""
+
+    def __init__(self, app, limiter: RateLimiter, trust_forwarded_for: bool = False):
+        self.app = app
+        self.limiter = limiter
+        self.trust_forwarded_for = trust_forwarded_for
+
+    def _client_ip(self, scope) -> str:
+        """Address the trusted proxy appended to X-Forwarded-For, else the socket peer; interned as a limiter key"""
+        if self.trust_forwarded_for:
+            forwarded = None
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    forwarded = value
+            if forwarded:
+                # Earlier hops are whatever the client sent; only the last one was added by our proxy
+                ip = forwarded.rsplit(b",", 1)[-1].strip()
+                if ip:
+                    return sys.intern(ip.decode("latin-1"))
+        client = scope.get("client")
+        return sys.intern(client[0]) if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = self._client_ip(scope)
+
+        if not self.limiter.shared:
+            # In-memory check is synchronous work, nothing to overlap it with
+            if not await self.limiter.hit(client_ip):
+                await self._reject(send)
+                return
+            await self.app(scope, receive, self._with_headers(send))
+            return
+
+        # Overlap the Redis round trip with routing and the inner middleware; the request body
+        # can't be read and no response can start until the check allows the request
+        allowed = asyncio.ensure_future(self.limiter.hit(client_ip))
+
+        async def gated_receive():
+            if not await allowed:
+                raise _RateLimited()
+            return await receive()
+
+        send_with_headers = self._with_headers(send)
+
+        async def gated_send(message):
+            if message["type"] == "http.response.start" and not await allowed:
+                raise _RateLimited()
+            await send_with_headers(message)
+
+        try:
+            await self.app(scope, gated_receive, gated_send)
+        except _RateLimited:
+            await self._reject(send)
+        except Exception:
+            # Errors raised while the check was still pending are reported as a 429 if it denies
+            if not await allowed:
+                await self._reject(send)
+                return
+            raise
+
+    @staticmethod
+    def _with_headers(send):
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                # ASGI allows any iterable here, so build a new list rather than extending in place
+                message["headers"] = [*message.get("headers", ()), *SECURITY_HEADER_PAIRS]
+            await send(message)
+        return send_with_headers
+
+    @staticmethod
+    async def _reject(send):
+        await send({"type": "http.response.start", "status": 429, "headers": [*_RATE_LIMITED_HEADERS, *SECURITY_HEADER_PAIRS]})
+        await send({"type": "http.response.body", "body": _RATE_LIMITED_BODY})